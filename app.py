@@ -3,7 +3,9 @@ Gradio app for Kannada BPE Tokenizer visualization.
 Usage: python app.py
 """
 import gradio as gr
+import os
 import re
+from functools import lru_cache
 from tokenizer import KannadaBPETokenizer
 
 
@@ -15,111 +17,211 @@ COLORS = [
     '#FFCCE6', '#FFCCB3', '#FFFFCC', '#CCFFE6', '#CCE6FF'
 ]
 
+# The token ID table is virtualized: only a window of rows is in the DOM and
+# spacer rows stand in for the rest. Rows have a fixed height so the scroll
+# offset maps directly to a row index.
+_TABLE_ROW_HEIGHT = 40
+_TABLE_WINDOW_ROWS = 40
 
-def tokenize_and_visualize(text: str, tokenizer: KannadaBPETokenizer):
-    """Tokenize text and create HTML visualization with hover effects."""
+# Token count display
+_EMPTY_COUNT_HTML = "<p style='color: gray;'>Token count will appear here</p>"
+_COUNT_TMPL = """
+<div style="padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+            border-radius: 12px; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+    <h2 style="color: white; margin: 0; font-size: 48px; font-weight: bold;">{total}</h2>
+    <p style="color: rgba(255,255,255,0.9); margin: 5px 0 0 0; font-size: 18px;">Total Tokens</p>
+    <p style="color: rgba(255,255,255,0.8); margin: 5px 0 0 0; font-size: 14px;">{unique} Unique Tokens</p>
+</div>
+"""
+
+# Static containers the browser renders tokens into. The server only sends
+# the token data (see tokenize_and_visualize); _RENDER_JS builds the DOM.
+_TOKENS_SHELL = """
+<style>
+    .token-span {
+        padding: 4px 8px;
+        margin: 2px;
+        border-radius: 4px;
+        cursor: pointer;
+        transition: all 0.2s;
+        display: inline-block;
+        font-weight: 500;
+    }
+    .token-span:hover {
+        transform: scale(1.15);
+        box-shadow: 0 4px 12px rgba(0,0,0,0.25);
+        z-index: 100;
+    }
+</style>
+<div id="tok-root" style="font-size: 20px; line-height: 2.8; font-family: Noto Sans Kannada, Arial, sans-serif; padding: 15px; background: #f9f9f9; border-radius: 8px;">
+    <p style='color: gray; font-size: 16px;'>Enter some Kannada text to tokenize...</p>
+</div>
+"""
+
+_TABLE_SHELL = """
+<style>
+    .token-row { height: ROW_HEIGHTpx; border-bottom: 1px solid #ddd; }
+    .token-row td { padding: 0 8px; white-space: nowrap; }
+    .token-row td:nth-child(2) { font-weight: bold; }
+    .token-swatch { padding: 4px 12px; border-radius: 4px; display: inline-block; }
+</style>
+<div id="tok-ids" style="padding: 15px; background: #f0f0f0; border-radius: 8px; max-height: 400px; overflow-y: auto;">
+    <table style="width: 100%; border-collapse: collapse; font-family: monospace;">
+        <thead><tr style="background: #667eea; color: white; position: sticky; top: 0;"><th style="padding: 10px; text-align: left;">Index</th><th style="padding: 10px; text-align: left;">Token ID</th><th style="padding: 10px; text-align: left;">Token</th><th style="padding: 10px; text-align: left;">Color</th></tr></thead>
+        <tbody><tr><td colspan="4" style="padding: 8px; color: gray;">Token IDs will appear here</td></tr></tbody>
+    </table>
+</div>
+""".replace('ROW_HEIGHT', str(_TABLE_ROW_HEIGHT))
+
+# Renders the token payload into the shells: one span per token, and the
+# visible window of the token ID table, re-rendered on scroll.
+_RENDER_JS = """
+(data) => {
+    const root = document.getElementById('tok-root');
+    const table = document.getElementById('tok-ids');
+    if (!root || !table) return [];
+    const body = table.querySelector('tbody');
+    table.onscroll = null;
+
+    if (!data || !data.ids.length) {
+        root.innerHTML = "<p style='color: gray; font-size: 16px;'>Enter some Kannada text to tokenize...</p>";
+        body.innerHTML = '<tr><td colspan="4" style="padding: 8px; color: gray;">Token IDs will appear here</td></tr>';
+        return [];
+    }
+
+    const tokens = data.tokens;
+    const ids = data.ids;
+
+    const spans = document.createDocumentFragment();
+    ids.forEach((u, idx) => {
+        const [tid, text, rep, color] = tokens[u];
+        const span = document.createElement('span');
+        span.className = 'token-span';
+        span.dataset.tokenIdx = idx;
+        span.style.backgroundColor = color;
+        span.title = 'Token #' + idx + '\\nToken ID: ' + tid + '\\nText: ' + rep;
+        span.textContent = text;
+        spans.appendChild(span);
+    });
+    root.replaceChildren(spans);
+
+    const cell = (content) => {
+        const td = document.createElement('td');
+        td.textContent = content;
+        return td;
+    };
+    const spacer = (n) => {
+        const tr = document.createElement('tr');
+        tr.style.height = (n * ROW_HEIGHT) + 'px';
+        tr.appendChild(cell(''));
+        tr.firstChild.colSpan = 4;
+        tr.firstChild.style.padding = '0';
+        return tr;
+    };
+    let start = -1;
+    table.onscroll = () => {
+        const first = Math.max(0, Math.floor(table.scrollTop / ROW_HEIGHT) - 5);
+        if (first === start) return;
+        start = first;
+        const end = Math.min(ids.length, first + WINDOW_ROWS);
+        const rows = [spacer(first)];
+        for (let i = first; i < end; i++) {
+            const [tid, , rep, color] = tokens[ids[i]];
+            const swatch = document.createElement('span');
+            swatch.className = 'token-swatch';
+            swatch.style.backgroundColor = color;
+            swatch.innerHTML = '&nbsp;';
+            const tr = document.createElement('tr');
+            tr.className = 'token-row';
+            tr.append(cell(i), cell(tid), cell(rep), cell(''));
+            tr.lastChild.appendChild(swatch);
+            rows.push(tr);
+        }
+        rows.push(spacer(ids.length - end));
+        body.replaceChildren(...rows);
+    };
+    table.scrollTop = 0;
+    table.onscroll();
+    return [];
+}
+""".replace('ROW_HEIGHT', str(_TABLE_ROW_HEIGHT)).replace('WINDOW_ROWS', str(_TABLE_WINDOW_ROWS))
+
+
+def tokenize_and_visualize(text: str, tokenizer: KannadaBPETokenizer,
+                           compiled_pattern: re.Pattern, apply_bpe):
+    """Tokenize text and build the token count HTML and visualization data.
+
+    `compiled_pattern` splits text into pre-tokenization chunks and
+    `apply_bpe` maps a chunk to its token IDs (see create_app).
+
+    The visualization data is {"tokens": [[id, text, repr, color], ...],
+    "ids": [...]}, with one entry in "tokens" per unique token and "ids"
+    indexing into it in text order. It is rendered in the browser.
+    """
     if not text.strip():
-        return (
-            "<p style='color: gray; font-size: 16px;'>Enter some Kannada text to tokenize...</p>",
-            "<p style='color: gray;'>Token count will appear here</p>",
-            "<p style='color: gray;'>Token IDs will appear here</p>"
-        )
+        return _EMPTY_COUNT_HTML, None
     
-    # Get token IDs
-    token_ids = tokenizer.encode(text)
+    # Get token IDs in text order, running BPE once per chunk and
+    # flattening as we go (same order as KannadaBPETokenizer.encode)
+    chunks = compiled_pattern.findall(text)
+    token_ids = [tid for chunk in chunks for tid in apply_bpe(chunk)]
     
-    # Create a mapping of unique token IDs to colors
-    unique_token_ids = []
+    # Create a mapping of unique token IDs to colors, in order of first
+    # appearance (dicts preserve insertion order)
     token_id_to_color = {}
-    color_idx = 0
     
     for tid in token_ids:
         if tid not in token_id_to_color:
-            token_id_to_color[tid] = COLORS[color_idx % len(COLORS)]
-            unique_token_ids.append(tid)
-            color_idx += 1
+            token_id_to_color[tid] = COLORS[len(token_id_to_color) % len(COLORS)]
     
-    # Build token visualization
-    html_parts = ['<div style="font-size: 20px; line-height: 2.8; font-family: Noto Sans Kannada, Arial, sans-serif; padding: 15px; background: #f9f9f9; border-radius: 8px;">']
+    # Send each unique token once; identical tokens share the same color
+    tokens = []
+    token_index = {}
+    for tid, color in token_id_to_color.items():
+        token_text = tokenizer.vocab[tid]
+        token_index[tid] = len(tokens)
+        tokens.append([tid, token_text, repr(token_text), color])
     
-    # Track position in original text
-    chunks = re.findall(tokenizer.pattern, text)
-    token_idx = 0
-    token_info_list = []
+    token_data = {
+        'tokens': tokens,
+        'ids': [token_index[tid] for tid in token_ids],
+    }
     
-    for chunk in chunks:
-        chunk_tokens = tokenizer._apply_bpe(chunk)
-        
-        for tid in chunk_tokens:
-            token_text = tokenizer.vocab[tid]
-            color = token_id_to_color[tid]  # Use consistent color for same token ID
-            
-            # Store token info for display
-            token_info_list.append((token_idx, tid, token_text, color))
-            
-            # Create span with hover effect
-            html_parts.append(
-                f'<span class="token-span" data-token-idx="{token_idx}" '
-                f'style="background-color: {color}; padding: 4px 8px; '
-                f'margin: 2px; border-radius: 4px; cursor: pointer; '
-                f'transition: all 0.2s; display: inline-block; font-weight: 500;" '
-                f'title="Token #{token_idx}&#10;Token ID: {tid}&#10;Text: {repr(token_text)}">'
-                f'{token_text}</span>'
-            )
-            
-            token_idx += 1
-    
-    html_parts.append('</div>')
-    
-    # Add custom CSS for better hover effects
-    css = """
-    <style>
-        .token-span:hover {
-            transform: scale(1.15);
-            box-shadow: 0 4px 12px rgba(0,0,0,0.25);
-            z-index: 100;
-        }
-    </style>
-    """
-    
-    tokens_html = css + ''.join(html_parts)
-    
-    # Create token count display
-    count_html = f"""
-    <div style="padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                border-radius: 12px; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-        <h2 style="color: white; margin: 0; font-size: 48px; font-weight: bold;">{len(token_ids)}</h2>
-        <p style="color: rgba(255,255,255,0.9); margin: 5px 0 0 0; font-size: 18px;">Total Tokens</p>
-        <p style="color: rgba(255,255,255,0.8); margin: 5px 0 0 0; font-size: 14px;">{len(unique_token_ids)} Unique Tokens</p>
-    </div>
-    """
-    
-    # Create token IDs display
-    token_ids_html = ['<div style="padding: 15px; background: #f0f0f0; border-radius: 8px; max-height: 400px; overflow-y: auto;">']
-    token_ids_html.append('<table style="width: 100%; border-collapse: collapse; font-family: monospace;">')
-    token_ids_html.append('<tr style="background: #667eea; color: white;"><th style="padding: 10px; text-align: left;">Index</th><th style="padding: 10px; text-align: left;">Token ID</th><th style="padding: 10px; text-align: left;">Token</th><th style="padding: 10px; text-align: left;">Color</th></tr>')
-    
-    for idx, tid, ttext, color in token_info_list:
-        token_ids_html.append(
-            f'<tr style="border-bottom: 1px solid #ddd;">'
-            f'<td style="padding: 8px;">{idx}</td>'
-            f'<td style="padding: 8px; font-weight: bold;">{tid}</td>'
-            f'<td style="padding: 8px;">{repr(ttext)}</td>'
-            f'<td style="padding: 8px;"><span style="background-color: {color}; padding: 4px 12px; border-radius: 4px; display: inline-block;">&nbsp;</span></td>'
-            f'</tr>'
-        )
-    
-    token_ids_html.append('</table></div>')
+    count_html = _COUNT_TMPL.format(total=len(token_ids), unique=len(token_id_to_color))
     
-    return tokens_html, count_html, ''.join(token_ids_html)
+    return count_html, token_data
 
 
 def create_app(tokenizer: KannadaBPETokenizer):
     """Create Gradio interface."""
     
+    compiled_pattern = re.compile(tokenizer.pattern)
+    
+    # BPE is deterministic per chunk and natural text repeats chunks heavily
+    # (whitespace, common words), so memoize the per-chunk merge loop.
+    @lru_cache(maxsize=65536)
+    def cached_apply_bpe(chunk):
+        return tuple(tokenizer._apply_bpe(chunk))
+    
+    # Repeat submissions (re-clicking an example, toggling back to earlier
+    # text) skip all work. The tokenizer is fixed for the life of the app,
+    # so the text alone is a sufficient key. Results are cached as tuples so
+    # a response can never mutate what later requests are served.
+    @lru_cache(maxsize=128)
+    def cached_tokenize(text):
+        count_html, token_data = tokenize_and_visualize(
+            text, tokenizer, compiled_pattern, cached_apply_bpe
+        )
+        if token_data is None:
+            return count_html, None, None
+        tokens = tuple(tuple(token) for token in token_data['tokens'])
+        return count_html, tokens, tuple(token_data['ids'])
+    
     def process_text(text):
-        tokens_html, count_html, ids_html = tokenize_and_visualize(text, tokenizer)
-        return tokens_html, count_html, ids_html
+        count_html, tokens, ids = cached_tokenize(text)
+        if tokens is None:
+            return count_html, None
+        return count_html, {'tokens': list(tokens), 'ids': list(ids)}
     
     with gr.Blocks(title="Kannada BPE Tokenizer", theme=gr.themes.Soft()) as demo:
         gr.Markdown(
@@ -156,17 +258,21 @@ def create_app(tokenizer: KannadaBPETokenizer):
             with gr.Column(scale=1):
                 token_count = gr.HTML(
                     label="Token Count",
-                    value="<p style='color: gray;'>Token count will appear here</p>"
+                    value=_EMPTY_COUNT_HTML
                 )
                 
                 output_html = gr.HTML(
-                    label="Tokens (Hover to see details)"
+                    label="Tokens (Hover to see details)",
+                    value=_TOKENS_SHELL
                 )
                 
                 token_ids_display = gr.HTML(
                     label="Token IDs",
-                    value="<p style='color: gray;'>Token IDs will appear here</p>"
+                    value=_TABLE_SHELL
                 )
+                
+                # Token payload rendered client-side into the two shells above
+                token_data = gr.JSON(visible=False)
         
         gr.Markdown(
             """
@@ -181,18 +287,30 @@ def create_app(tokenizer: KannadaBPETokenizer):
             """
         )
         
-        # Set up event handlers
+        # Set up event handlers. Minimal progress keeps loading and queue
+        # position feedback without the full overlay across the outputs.
         tokenize_btn.click(
             fn=process_text,
             inputs=[input_text],
-            outputs=[output_html, token_count, token_ids_display]
+            outputs=[token_count, token_data],
+            show_progress="minimal"
         )
         
         input_text.submit(
             fn=process_text,
             inputs=[input_text],
-            outputs=[output_html, token_count, token_ids_display]
+            outputs=[token_count, token_data],
+            show_progress="minimal"
         )
+        
+        token_data.change(fn=None, inputs=[token_data], outputs=None, js=_RENDER_JS)
+    
+    # Queue requests so concurrent users wait their turn instead of piling
+    # GIL-bound encodes onto the server at once
+    demo.queue(
+        default_concurrency_limit=max(2, (os.cpu_count() or 1) // 2),
+        max_size=32
+    )
     
     return demo
 
@@ -210,6 +328,9 @@ def main():
         print("Please run 'python train.py' first to train and save the tokenizer.")
         return
     
+    # Warm up encoding so the first request is not served cold
+    tokenizer.warmup()
+    
     # Create and launch app
     demo = create_app(tokenizer)
     demo.launch(share=True)
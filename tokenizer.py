@@ -3,16 +3,66 @@
 # ============================================================
 import re
 from collections import Counter
-from typing import List
+from typing import Iterable, List
 import json
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib json module
+    orjson = None
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # Optional: fall back to the pure-Python merge loop
+    np = None
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _merge_njit(ids, pair_keys, pair_ranks, pair_new_ids):
+        """Apply BPE merges to an int32 array of token IDs.
+
+        Pairs are encoded as (left << 32) | right in the sorted `pair_keys`,
+        with their merge rank and merged token ID in the parallel arrays.
+        """
+        ids = ids.copy()
+        n = ids.shape[0]
+        num_pairs = pair_keys.shape[0]
+        while n > 1:
+            min_rank = np.iinfo(np.int32).max
+            min_pos = -1
+            min_idx = -1
+            for i in range(n - 1):
+                key = (np.int64(ids[i]) << 32) | np.int64(ids[i + 1])
+                j = np.searchsorted(pair_keys, key)
+                if j < num_pairs and pair_keys[j] == key and pair_ranks[j] < min_rank:
+                    min_rank = pair_ranks[j]
+                    min_pos = i
+                    min_idx = j
+
+            if min_pos == -1:
+                break
+
+            ids[min_pos] = pair_new_ids[min_idx]
+            ids[min_pos + 1:n - 1] = ids[min_pos + 2:n]
+            n -= 1
+        return ids[:n]
+else:
+    _merge_njit = None
+
+# Shorter chunks merge faster in pure Python than the array round-trip costs
+_NJIT_MIN_LEN = 16
+
 
 class KannadaBPETokenizer:
     def __init__(self):
-        self.vocab = {}           # Maps token_id to token_str
-        self.inverse_vocab = {}   # Maps token_str to token_id
-        self.bpe_merges = []      # Ordered list of merge operations
-        self.bpe_ranks = {}       # Maps pair to merge rank/priority
+        self.vocab = {}            # Maps token_id to token_str
+        self.inverse_vocab = {}    # Maps token_str to token_id
+        self.bpe_merges = []       # Ordered list of merge operations
+        self.bpe_ranks = {}        # Maps pair to merge rank/priority
+        self._merge_tables = None  # Array form of bpe_ranks for _merge_njit
 
         # Regex pattern for encoding
         self.pattern = re.compile(
@@ -27,14 +77,34 @@ class KannadaBPETokenizer:
 
     def train(self, text: str, vocab_size: int):
         """Train the BPE tokenizer from scratch."""
-        unique_chars = sorted(set(text))
+        self.train_from_iter([text], vocab_size)
+
+    def train_from_iter(self, texts: Iterable[str], vocab_size: int, separator: str = "\n\n"):
+        """Train the BPE tokenizer from scratch on an iterable of texts.
+
+        Equivalent to train(separator.join(texts), vocab_size), but the texts
+        are consumed one at a time and never joined into a single string.
+        """
+        # Number characters in order of first appearance while streaming,
+        # then renumber so IDs follow sorted character order as in train()
+        first_seen = {}
+        token_ids = []
+        for i, text in enumerate(texts):
+            if i > 0:
+                token_ids.extend(first_seen.setdefault(c, len(first_seen)) for c in separator)
+            token_ids.extend(first_seen.setdefault(c, len(first_seen)) for c in text)
+
+        unique_chars = sorted(first_seen)
         self.vocab = {i: char for i, char in enumerate(unique_chars)}
         self.inverse_vocab = {char: i for i, char in self.vocab.items()}
+        remap = [0] * len(first_seen)
+        for char, seen_id in first_seen.items():
+            remap[seen_id] = self.inverse_vocab[char]
+        token_ids = [remap[t] for t in token_ids]
 
         print(f"Initial vocab size (unique characters): {len(self.vocab)}")
 
-        initial_token_count = len(text)
-        token_ids = [self.inverse_vocab[c] for c in text]
+        initial_token_count = len(token_ids)
         
         print(f"Training on {initial_token_count} characters")
         
@@ -57,6 +127,8 @@ class KannadaBPETokenizer:
             if (merge_idx + 1) % 1000 == 0:
                 print(f"Merged {merge_idx + 1}/{num_merges} pairs, vocab size: {len(self.vocab)}")
 
+        self._build_merge_tables()
+
         final_token_count = len(token_ids)
         compression_ratio = initial_token_count / final_token_count
         
@@ -89,6 +161,23 @@ class KannadaBPETokenizer:
                 i += 1
         return result
 
+    def _build_merge_tables(self):
+        """Encode bpe_ranks as sorted numpy arrays for the Numba merge loop."""
+        if _merge_njit is None or not self.bpe_ranks:
+            self._merge_tables = None
+            return
+
+        entries = sorted(
+            ((a << 32) | b, rank, self.inverse_vocab[self.vocab[a] + self.vocab[b]])
+            for (a, b), rank in self.bpe_ranks.items()
+        )
+        keys, ranks, new_ids = zip(*entries)
+        self._merge_tables = (
+            np.array(keys, dtype=np.int64),
+            np.array(ranks, dtype=np.int32),
+            np.array(new_ids, dtype=np.int32),
+        )
+
     def _apply_bpe(self, token_str: str) -> List[int]:
         """Apply BPE merges to a string token."""
         token_ids = []
@@ -101,6 +190,10 @@ class KannadaBPETokenizer:
         if len(token_ids) <= 1:
             return token_ids
 
+        if self._merge_tables is not None and len(token_ids) >= _NJIT_MIN_LEN:
+            ids = np.array(token_ids, dtype=np.int32)
+            return _merge_njit(ids, *self._merge_tables).tolist()
+
         while len(token_ids) > 1:
             min_rank = float('inf')
             min_pos = -1
@@ -125,12 +218,23 @@ class KannadaBPETokenizer:
 
     def encode(self, text: str) -> List[int]:
         """Encode text into token IDs."""
-        chunks = re.findall(self.pattern, text)
+        chunks = self.pattern.findall(text)
         token_ids = []
         for chunk in chunks:
             token_ids.extend(self._apply_bpe(chunk))
         return token_ids
 
+    def warmup(self):
+        """Run the encode path once so the first real call is not cold.
+
+        The last sample is a single chunk of at least _NJIT_MIN_LEN
+        characters, so it also compiles the optional Numba merge kernel.
+        """
+        word = "ಕನ್ನಡ"
+        long_chunk = word * -(-_NJIT_MIN_LEN // len(word))
+        for sample in ["ನಮಸ್ಕಾರ", "ಕನ್ನಡ ಟೋಕನೈಜರ್", long_chunk]:
+            self.encode(sample)
+
     def decode(self, token_ids: List[int]) -> str:
         """Convert token IDs back to text."""
         result = []
@@ -141,22 +245,32 @@ class KannadaBPETokenizer:
 
     def save_vocab(self, filepath: str):
         """Save vocabulary and merge rules to JSON file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump({
-                'vocab': {str(k): v for k, v in self.vocab.items()},
-                'bpe_merges': [[p[0], p[1]] for p in self.bpe_merges]
-            }, f, ensure_ascii=False, indent=2)
+        state = {
+            'vocab': {str(k): v for k, v in self.vocab.items()},
+            'bpe_merges': [[p[0], p[1]] for p in self.bpe_merges]
+        }
+        if orjson is not None:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
         print(f"Saved vocabulary to {filepath}")
 
     def load_vocab(self, filepath: str):
         """Load vocabulary and merge rules from JSON file."""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            with open(filepath, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         self.vocab = {int(k): v for k, v in data['vocab'].items()}
         self.inverse_vocab = {v: k for k, v in self.vocab.items()}
         self.bpe_merges = [tuple(pair) for pair in data['bpe_merges']]
         self.bpe_ranks = {tuple(pair): idx for idx, pair in enumerate(self.bpe_merges)}
+        self._build_merge_tables()
         
         print(f"Loaded vocabulary from {filepath} (size: {len(self.vocab)})")
 